@@ -14,65 +14,88 @@
 
 """Investment account abstraction"""
 from absl import logging
-import copy
-import csv
+import functools
+import math
 import os
-from typing import Dict, List, Text, Union
-import re
+from typing import Dict, List, NamedTuple, Text, Union
+
+import numpy as np
+import pandas as pd
 
 import investment
 
 ACCOUNT_SUBDIR = "data"
 
+# Columns read from an account file
+_HOLDING_COLUMNS = ('symbol', 'description', 'num_shares', 'share_price')
+# Columns of Account.holdings_frame, named as in the portfolio DataFrame
+FRAME_COLUMNS = ('fund_name', 'asset_class', 'ticker_symbol', 'share_price', 'num_shares', 'value')
+# Deletes currency symbols, signs and thousands separators from numeric fields
+_CURRENCY_TABLE = str.maketrans('', '', '$,+% ')
+
+
+class HoldingArrays(NamedTuple):
+    """The holdings of an account laid out as one array per attribute, in holdings order."""
+    fund_names: np.ndarray
+    asset_classes: np.ndarray
+    ticker_symbols: np.ndarray
+    share_prices: np.ndarray
+    num_shares: np.ndarray
+
+
+def _strip_currency(text: Text) -> float:
+    """Converts a field such as '$1,234.50' to a float, or to NaN if it holds no number."""
+    try:
+        return float(text.translate(_CURRENCY_TABLE))
+    except ValueError:
+        return math.nan
+
 
 class Account:
     """An abstraction layer for various types of investment data."""
 
-    def __init__(self, account_desc: Dict[Text, Union[Text, Dict[Text, Text]]]):
+    def __init__(self, account_desc: Dict[Text, Union[Text, bool, Dict[Text, Text]]]):
         self._name = account_desc['name']
         self._institution = account_desc['institution']
         self._account_file = account_desc['filename']
-        self._is_taxable = True if account_desc['taxable'] == 'True' else False
-        self._holdings = []
-        self._get_holdings(account_desc)
-        self._options = [holding.fund for holding in self._holdings]
+        taxable = account_desc['taxable']
+        self._is_taxable = taxable if isinstance(taxable, bool) else taxable.strip().lower() == 'true'
+        self._holdings_frame = self._get_holdings(account_desc)
+        self._holdings_arrays = None
 
-    def _get_holdings(self, account_desc: Dict[Text, Union[Text, Dict[Text, Text]]]
-                      ) -> List[investment.Investment]:
+    def _get_holdings(self, account_desc: Dict[Text, Union[Text, Dict[Text, Text]]]) -> pd.DataFrame:
         account_file: str = os.path.join(ACCOUNT_SUBDIR, account_desc['filename'])
-        header_to_type = {val: key for key, val in account_desc['headers'].items()}
+        headers = account_desc['headers']
+        header_to_type = {val: key for key, val in headers.items()}
+        usecols = [headers[column] for column in _HOLDING_COLUMNS]
+        converters = {headers[column]: _strip_currency for column in ('num_shares', 'share_price')}
+        dtypes = {headers[column]: str for column in ('symbol', 'description')}
         with open(account_file) as csv_file:
-            csv_reader = csv.reader(csv_file, delimiter=',')
-            line_count = 0
-            col_mapping = {}
-            for row in csv_reader:
-                if not line_count:
-                    column_headers = row
-                    for index, ele in enumerate(column_headers):
-                        if ele in header_to_type:
-                            col_mapping[header_to_type[ele]] = index
-                    logging.info('Column names are %s', ', '.join(column_headers))
-                    logging.info('%s, : col_mapping %s', __name__, col_mapping)
-                    line_count += 1
-                else:
-                    logging.info('%s, Processing: %s', __name__, row)
-                    ticker_symbol = row[col_mapping['symbol']]
-                    name = row[col_mapping['description']]
-                    if ticker_symbol not in investment.LOOKUP:
-                        logging.warning('Missing %s from account %s', ticker_symbol, name)
-                        continue
-                    asset_class = investment.LOOKUP[ticker_symbol]
-                    num_shares = row[col_mapping['num_shares']]
-                    num_shares = float(re.sub('[^\d.]', '', num_shares))
-                    share_price = row[col_mapping['share_price']]
-                    share_price = float(re.sub('[^\d.]', '', share_price))
-                    holding = investment.Investment(ticker_symbol, asset_class, name,
-                                                    num_shares, share_price=share_price)
-                    self._holdings.append(holding)
-                    row_str = '\t'.join(row)
-                    logging.info(row_str)
-                    line_count += 1
-            logging.info(f'Processed {line_count} lines.')
+            df = pd.read_csv(csv_file, usecols=usecols, dtype=dtypes, converters=converters, index_col=False)
+        df = df.rename(columns=header_to_type)
+        if logging.level_debug():
+            logging.debug('Column names are %s', ', '.join(df.columns))
+        codes = investment.lookup_many(df['symbol'].to_numpy())
+        known = codes != 0
+        for ticker_symbol, name in df.loc[~known, ['symbol', 'description']].itertuples(index=False):
+            logging.warning('Missing %s from account %s', ticker_symbol, name)
+        df = df.loc[known].copy()
+        codes = codes[known]
+        if df[['num_shares', 'share_price']].isna().any(axis=None):
+            raise ValueError(f'Missing share count or share price in {account_file}')
+        df = df.rename(columns={'symbol': 'ticker_symbol', 'description': 'fund_name'})
+        df['asset_class'] = investment.asset_classes_of(codes)
+        df['value'] = df['num_shares'] * df['share_price']
+        logging.info('Processed %d lines.', len(df.index))
+        return df[list(FRAME_COLUMNS)].reset_index(drop=True)
+
+    @functools.cached_property
+    def _holdings(self) -> List[investment.Investment]:
+        """Materializes the Investment objects on first use."""
+        columns = ['ticker_symbol', 'asset_class', 'fund_name', 'num_shares', 'share_price']
+        return [investment.Investment(ticker_symbol, asset_class, name, num_shares, share_price=share_price)
+                for ticker_symbol, asset_class, name, num_shares, share_price
+                in self._holdings_frame[columns].itertuples(index=False)]
 
     @property
     def name(self):
@@ -84,15 +107,41 @@ class Account:
 
     @property
     def holdings(self) -> List[investment.Investment]:
-        return copy.deepcopy(self._holdings)
+        """Gets a copy of the holdings list; the Investment objects themselves are shared."""
+        return list(self._holdings)
 
     @holdings.setter
     def holdings(self, holdings: List[investment.Investment]):
         self._holdings = holdings
+        self._holdings_frame = None
+        self._holdings_arrays = None
+
+    @property
+    def holdings_frame(self) -> pd.DataFrame:
+        """Gets the holdings as a DataFrame with one row per holding and FRAME_COLUMNS as columns."""
+        if self._holdings_frame is None:
+            self._holdings_frame = pd.DataFrame(
+                [(holding.fund.name, holding.asset_class, holding.ticker_symbol, holding.share_price,
+                  holding.num_shares, holding.value) for holding in self._holdings],
+                columns=FRAME_COLUMNS)
+        return self._holdings_frame
+
+    @property
+    def holdings_arrays(self) -> HoldingArrays:
+        """Gets the holdings as contiguous arrays, sharing memory with holdings_frame where possible."""
+        if self._holdings_arrays is None:
+            frame = self.holdings_frame
+            self._holdings_arrays = HoldingArrays(
+                fund_names=frame['fund_name'].to_numpy(dtype=object),
+                asset_classes=frame['asset_class'].to_numpy(dtype=object),
+                ticker_symbols=frame['ticker_symbol'].to_numpy(dtype=object),
+                share_prices=frame['share_price'].to_numpy(dtype=np.float64),
+                num_shares=frame['num_shares'].to_numpy(dtype=np.float64))
+        return self._holdings_arrays
 
     @property
     def investment_options(self):
-        return copy.deepcopy(self._options)
+        return [holding.fund for holding in self._holdings]
 
     @property
     def is_taxable(self):
@@ -102,12 +151,8 @@ class Account:
     def cash(self) -> float:
         """Gets the amount of cash in this account.
         """
-        cash = 0.0
-        for holding in self._holdings:
-            if holding.asset_class == investment.AssetClass.CASH:
-                cash += holding.value
-
-        return cash
+        frame = self.holdings_frame
+        return float(frame.loc[frame['asset_class'] == investment.AssetClass.CASH, 'value'].sum())
 
     def __str__(self):
         result = f'{self._name} at {self._institution} with {len(self._holdings)}'
@@ -17,6 +17,7 @@ import account
 import decimal
 import investment
 import mock
+import pandas as pd
 
 
 class AccountTest(unittest.TestCase):
@@ -51,6 +52,25 @@ class AccountTest(unittest.TestCase):
                                                    decimal.Decimal(2337.151), share_price=110.25)]
         self.assertCountEqual(self._account.holdings, expected_holdings)
 
+    def test_holdings_frame(self):
+        expected_frame = pd.DataFrame({'fund_name': ['FIDELITY TOTAL MARKET INDEX FUND'],
+                                       'asset_class': [investment.AssetClass.CORE_US],
+                                       'ticker_symbol': ['FSKAX'],
+                                       'share_price': [110.25],
+                                       'num_shares': [2337.151],
+                                       'value': [2337.151 * 110.25]})
+        pd.testing.assert_frame_equal(self._account.holdings_frame, expected_frame)
+
+    def test_holdings_arrays(self):
+        arrays = self._account.holdings_arrays
+        self.assertEqual(list(arrays.ticker_symbols), ['FSKAX'])
+        self.assertEqual(list(arrays.asset_classes), [investment.AssetClass.CORE_US])
+        self.assertEqual(list(arrays.num_shares), [2337.151])
+        holdings = self._account.holdings
+        holdings[0].num_shares = 100
+        self._account.holdings = holdings
+        self.assertEqual(list(self._account.holdings_arrays.num_shares), [100])
+
     def test_investment_options(self):
         expected_funds = [investment.Fund('FSKAX', investment.AssetClass.CORE_US, 'FIDELITY TOTAL MARKET INDEX FUND',
                                           110.25)]
@@ -59,6 +79,12 @@ class AccountTest(unittest.TestCase):
     def test_is_taxable(self):
         self.assertTrue(self._account.is_taxable, True)
 
+    def test_is_taxable_parsing(self):
+        for taxable, expected in (('true', True), (' TRUE ', True), (True, True), ('False', False), (False, False)):
+            self._account_desc['taxable'] = taxable
+            with mock.patch('account.open', mock.mock_open(read_data=self._account_data)):
+                self.assertEqual(account.Account(self._account_desc).is_taxable, expected)
+
     def test_cash(self):
         self.assertAlmostEqual(self._account.cash, 0.0)
 
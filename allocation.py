@@ -17,13 +17,36 @@
 from absl import logging
 import copy
 import json
+import types
 from abc import ABC
-from typing import Dict, Text
+from typing import Dict, Mapping, Text
+import numpy as np
 import pandas as pd
 
 import investment
 
 
+_DESC2ASSETCLASS: Mapping[str, investment.AssetClass] = types.MappingProxyType({
+    'Money Market': investment.AssetClass.MONEY_MARKET,
+    'Investment Grade Bonds': investment.AssetClass.INVESTMENT_GRADE_BONDS,
+    'High Yield Bonds': investment.AssetClass.HIGH_YIELD_BONDS,
+    'Inflation Protected Bonds': investment.AssetClass.INFLATION_PROTECTED_BONDS,
+    'Core U.S.': investment.AssetClass.CORE_US,
+    'Small Cap': investment.AssetClass.SMALL_CAP,
+    'Microcap': investment.AssetClass.MICRO_CAP,
+    'Real Estate': investment.AssetClass.REAL_ESTATE,
+    'Pacific Rim Large': investment.AssetClass.PACIFIC_RIM_LARGE,
+    'Europe Large': investment.AssetClass.EUROPE_LARGE,
+    'International Small Cap Value': investment.AssetClass.INTERNATIONAL_SMALL_CAP_VALUE,
+    'Emerging Markets': investment.AssetClass.EMERGING_MARKETS,
+    'Cash': investment.AssetClass.CASH
+})
+
+# Position of each asset class within the dense allocation vector
+_ASSET_CLASS_POSITION: Mapping[investment.AssetClass, int] = types.MappingProxyType(
+    {asset_class: position for position, asset_class in enumerate(investment.AssetClass)})
+
+
 class Allocation(ABC):
     """Defines a percentage allocation to various asset classes.
 
@@ -33,6 +56,9 @@ class Allocation(ABC):
 
     def __init__(self, asset_class: Dict[investment.AssetClass, float]):
         self._asset_class = pd.DataFrame.from_dict(asset_class, orient='index')
+        self._vec = np.zeros(len(_ASSET_CLASS_POSITION))
+        for key, percentage in asset_class.items():
+            self._vec[_ASSET_CLASS_POSITION[key]] = percentage
 
     @property
     def dataframe(self):
@@ -42,39 +68,20 @@ class Allocation(ABC):
     def num_assets(self) -> int:
         return len(self._asset_class.index)
 
-    def __sub__(self, other) -> pd.DataFrame:
-        return self._asset_class.sub(other.dataframe, fill_value=0)
-
-    _desc2assetclass: Dict[str, investment.AssetClass] = {
-        'Money Market': investment.AssetClass.MONEY_MARKET,
-        'Investment Grade Bonds': investment.AssetClass.INVESTMENT_GRADE_BONDS,
-        'High Yield Bonds': investment.AssetClass.HIGH_YIELD_BONDS,
-        'Inflation Protected Bonds': investment.AssetClass.INFLATION_PROTECTED_BONDS,
-        'Core U.S.': investment.AssetClass.CORE_US,
-        'Small Cap': investment.AssetClass.SMALL_CAP,
-        'Microcap': investment.AssetClass.MICRO_CAP,
-        'Real Estate': investment.AssetClass.REAL_ESTATE,
-        'Pacific Rim Large': investment.AssetClass.PACIFIC_RIM_LARGE,
-        'Europe Large': investment.AssetClass.EUROPE_LARGE,
-        'International Small Cap Value': investment.AssetClass.INTERNATIONAL_SMALL_CAP_VALUE,
-        'Emerging Markets': investment.AssetClass.EMERGING_MARKETS,
-        'Cash': investment.AssetClass.CASH
-    }
+    def __sub__(self, other: 'Allocation') -> np.ndarray:
+        """Gets the difference in percentage allocation for every asset class, in investment.AssetClass order."""
+        return self._vec - other._vec
 
 
 class Target(Allocation):
     """Represents target investments by dollar percentage investment."""
 
     def __init__(self, filename: Text):
-        self._allocation = {}
         logging.info('Target Allocation Definition: %s', filename)
         with open(filename, mode='r', encoding='utf8') as target:
             asset_classes = json.load(target)
-            for asset_class in asset_classes:
-                logging.info('Target Allocation: %s', asset_class)
-                key = asset_class['asset_class']
-                val = asset_class['allocation']
-                self._allocation[self._desc2assetclass[key]] = float(val) * 100
+        self._allocation = {_DESC2ASSETCLASS[asset_class['asset_class']]: float(asset_class['allocation']) * 100
+                            for asset_class in asset_classes}
         super(Target, self).__init__(self._allocation)
 
     def __str__(self):
@@ -83,6 +83,18 @@ class TargetAllocationTest(unittest.TestCase):
         expected_pd = pd.DataFrame.from_dict(expected, orient='index')
         pd.testing.assert_frame_equal(self._allocation.dataframe, expected_pd)
 
+    def test_sub(self):
+        other = allocation.Allocation({investment.AssetClass.CORE_US: 10.0, investment.AssetClass.CASH: 5.0})
+        expected = {investment.AssetClass.INVESTMENT_GRADE_BONDS: 20.0,
+                    investment.AssetClass.CORE_US: 20.0,
+                    investment.AssetClass.SMALL_CAP: 20.0,
+                    investment.AssetClass.PACIFIC_RIM_LARGE: 30.0,
+                    investment.AssetClass.CASH: -5.0
+                    }
+        difference = self._allocation - other
+        for position, asset_class in enumerate(investment.AssetClass):
+            self.assertAlmostEqual(difference[position], expected.get(asset_class, 0.0))
+
 
 if __name__ == '__main__':
     unittest.main()
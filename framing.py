@@ -14,7 +14,7 @@
 
 """Defines initial allocation strategy pattern."""
 
-from typing import Any, List, Tuple
+from typing import Collection, FrozenSet, List, Tuple
 import abc
 import account
 import investment
@@ -24,24 +24,28 @@ import pandas as pd
 _JITTER = 1e-10
 
 
-def combine(x0_taxable: List[Any], x0_non_taxable: List[Any],
-            df: pd.DataFrame, taxable: List[str]) -> List[Any]:
+def combine(x0_taxable: np.ndarray, x0_non_taxable: np.ndarray, taxable_mask: np.ndarray) -> np.ndarray:
     """
     Combines the results of taxable and non-taxable parameter construction.
 
-    :param x0_taxable: List of taxable framing parameter values
-    :param x0_non_taxable: List of non-taxable framing parameter values
-    :param df: Underlying portfolio data as a Pandas dataframe
-    :param taxable: List of taxable account names
-    :return: List of combined framing values
+    Framing values hold either one value per holding or, for bounds, one (lower, upper) row per holding.
+
+    :param x0_taxable: Array of taxable framing parameter values
+    :param x0_non_taxable: Array of non-taxable framing parameter values
+    :param taxable_mask: Boolean array which is True for holdings in taxable accounts
+    :return: Array of combined framing values
     """
-    x0 = [0.] * len(df.index)
-    for holding in range(len(df.index)):
-        if df.loc[holding].account_name in taxable:
-            x0[holding] = x0_taxable[holding]
-        else:
-            x0[holding] = x0_non_taxable[holding]
-    return x0
+    x0_taxable = np.asarray(x0_taxable)
+    if x0_taxable.ndim > 1:
+        taxable_mask = taxable_mask[:, np.newaxis]
+    return np.where(taxable_mask, x0_taxable, np.asarray(x0_non_taxable))
+
+
+def _default_bounds(num_holdings: int) -> np.ndarray:
+    """Gets bounds which leave every holding unchanged, as one (lower, upper) row per holding."""
+    bounds = np.zeros((num_holdings, 2))
+    bounds[:, 1] = _JITTER
+    return bounds
 
 
 class Context:
@@ -52,6 +56,8 @@ class Context:
     def __init__(self, taxable: 'Strategy' = None, non_taxable: 'Strategy' = None) -> None:
         self._taxable = taxable
         self._non_taxable = non_taxable
+        self._partitioned_accounts = None
+        self._partition = (frozenset(), frozenset())
 
     @property
     def taxable(self) -> 'Strategy':
@@ -69,6 +75,19 @@ class Context:
     def non_taxable(self, strategy: 'Strategy') -> None:
         self._non_taxable = strategy
 
+    def _partition_accounts(self, accounts: List[account.Account]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+        """
+        Splits the account names into taxable and non-taxable sets.
+
+        The split is reused for as long as the same account objects are passed in.
+        """
+        accounts = tuple(accounts)
+        if accounts != self._partitioned_accounts:
+            self._partition = (frozenset(acct.name for acct in accounts if acct.is_taxable),
+                               frozenset(acct.name for acct in accounts if not acct.is_taxable))
+            self._partitioned_accounts = accounts
+        return self._partition
+
     def get_initial_allocation(self, df: pd.DataFrame,
                                accounts: List[account.Account]) -> np.ndarray:
         """
@@ -76,29 +95,35 @@ class Context:
         :rtype: object
         :return:
         """
-        taxable = [acct.name for acct in accounts if acct.is_taxable]
-        non_taxable = [acct.name for acct in accounts if not acct.is_taxable]
-        x0_taxable = x0_non_taxable = np.zeros(len(df.index))
+        taxable, non_taxable = self._partition_accounts(accounts)
         if self._taxable is not None and len(taxable) > 0:
             x0_taxable = self._taxable.initial_allocation(df, taxable)
+        else:
+            x0_taxable = np.zeros(len(df.index))
         if self._non_taxable is not None and len(non_taxable) > 0:
             x0_non_taxable = self._non_taxable.initial_allocation(df, non_taxable)
-        return np.asarray(combine(x0_taxable, x0_non_taxable, df, taxable))
+        else:
+            x0_non_taxable = np.zeros(len(df.index))
+        taxable_mask = df['account_name'].isin(taxable).to_numpy()
+        return combine(x0_taxable, x0_non_taxable, taxable_mask)
 
     def get_allocation_bounds(self, df: pd.DataFrame,
-                              accounts: List[account.Account]) -> List[Tuple[float, float]]:
+                              accounts: List[account.Account]) -> np.ndarray:
         """
         Executes the concrete strategy and returns the array of initial holding values
         :return:
         """
-        taxable = [acct.name for acct in accounts if acct.is_taxable]
-        non_taxable = [acct.name for acct in accounts if not acct.is_taxable]
-        bounds_taxable = bounds_non_taxable = [(0, _JITTER)] * len(df.index)
+        taxable, non_taxable = self._partition_accounts(accounts)
         if self._taxable is not None and len(taxable) > 0:
             bounds_taxable = self._taxable.bounds(df, taxable)
+        else:
+            bounds_taxable = _default_bounds(len(df.index))
         if self._non_taxable is not None and len(non_taxable) > 0:
             bounds_non_taxable = self._non_taxable.bounds(df, non_taxable)
-        return combine(bounds_taxable, bounds_non_taxable, df, taxable)
+        else:
+            bounds_non_taxable = _default_bounds(len(df.index))
+        taxable_mask = df['account_name'].isin(taxable).to_numpy()
+        return combine(bounds_taxable, bounds_non_taxable, taxable_mask)
 
 
 class Strategy(abc.ABC):
@@ -111,24 +136,49 @@ class Strategy(abc.ABC):
     """
 
     @abc.abstractmethod
-    def initial_allocation(self, df: pd.DataFrame, accounts: List[str]) -> np.ndarray:
+    def initial_allocation(self, df: pd.DataFrame, accounts: Collection[str]) -> np.ndarray:
         raise NotImplemented()
 
     @abc.abstractmethod
-    def bounds(self, df: pd.DataFrame, accounts: List[str]) -> List[Tuple[float, float]]:
+    def bounds(self, df: pd.DataFrame, accounts: Collection[str]) -> np.ndarray:
         raise NotImplemented()
 
 
-def _get_cash(df: pd.DataFrame, account_name: str) -> float:
-    cash_holdings = df.loc[(df['account_name'] == account_name) &
-                           (df['asset_class'] == investment.AssetClass.CASH)]
-    return cash_holdings.value.agg('sum')
+def _get_cash_by_account(df: pd.DataFrame) -> pd.Series:
+    """Gets the total value of the cash holdings in each account, indexed by account name."""
+    cash_holdings = df.loc[df['asset_class'] == investment.AssetClass.CASH]
+    return cash_holdings.groupby('account_name', observed=True)['value'].sum()
+
+
+def _reciprocal(prices: np.ndarray) -> np.ndarray:
+    """Gets 1 / share price of each holding, or 0 for holdings without a price."""
+    inv_prices = np.zeros(prices.shape)
+    np.reciprocal(prices, out=inv_prices, where=prices != 0)
+    return inv_prices
+
+
+def _fill_bounds(values: np.ndarray, inv_prices: np.ndarray, is_cash: np.ndarray, acct_ids: np.ndarray,
+                 cash_per_acct: np.ndarray, jitter: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the cash bounded lower and upper purchase limits of every holding.
+
+    :param values: Value of each holding
+    :param inv_prices: Reciprocal of the share price of each holding
+    :param is_cash: Boolean array which is True for cash holdings
+    :param acct_ids: Integer code of the account of each holding
+    :param cash_per_acct: Cash available in each account, indexed by account code
+    :param jitter: Gap between the lower and upper bound of cash holdings
+    :return: Lower and upper bounds
+    """
+    lower = np.where(is_cash, -values, 0.)
+    upper = np.where(is_cash, jitter - values, cash_per_acct[acct_ids] * inv_prices)
+    return lower, upper
 
 
 class CashAllocationStrategy(Strategy):
     """Applied to cash, typically in taxable data. """
 
-    def initial_allocation(self, df: pd.DataFrame, accounts: List[str]) -> np.ndarray:
+    def initial_allocation(self, df: pd.DataFrame, accounts: Collection[str]) -> np.ndarray:
         """
         Gets an initial allocation of all cash into the existing funds held within each account.
 
@@ -141,20 +191,20 @@ class CashAllocationStrategy(Strategy):
         """
         num_holdings = len(df.index)
         x0 = np.zeros(num_holdings)
-        for acct in accounts:
-            total_cash = _get_cash(df, acct)
-            if total_cash > 0:
-                non_cash_holdings = df.loc[(df['account_name'] == acct) &
-                                           (df['asset_class'] != investment.AssetClass.CASH)]
-                max_idx = non_cash_holdings.value.idxmax()
-                x0[max_idx] = total_cash / df.iloc[max_idx].share_price
-                cash_holdings = df.loc[(df['account_name'] == acct) &
-                                       (df['asset_class'] == investment.AssetClass.CASH)]
-                for holding in cash_holdings.index:
-                    x0[holding] = -df.iloc[holding].value
+        values = df['value'].to_numpy()
+        inv_prices = _reciprocal(df['share_price'].to_numpy(dtype=np.float64))
+        is_cash = df['asset_class'] == investment.AssetClass.CASH
+        cash_by_acct = _get_cash_by_account(df)
+        max_idx = df.loc[~is_cash].groupby('account_name', observed=True)['value'].idxmax()
+        # Accounts holding only cash have nothing to buy, so they are left unchanged
+        funded = [acct for acct in accounts if cash_by_acct.get(acct, 0) > 0 and acct in max_idx.index]
+        for acct in funded:
+            x0[max_idx[acct]] = cash_by_acct[acct] * inv_prices[max_idx[acct]]
+        cash_holdings = (is_cash & df['account_name'].isin(funded)).to_numpy()
+        x0[cash_holdings] = -values[cash_holdings]
         return x0
 
-    def bounds(self, df: pd.DataFrame, accounts: List[str]) -> List[Tuple[float, float]]:
+    def bounds(self, df: pd.DataFrame, accounts: Collection[str]) -> np.ndarray:
         """
         Gets the cash bounded purchase limits for each holding within the portfolio.
 
@@ -167,29 +217,23 @@ class CashAllocationStrategy(Strategy):
 
         :param: df: Underlying portfolio in Pandas DataFrame format
         :param: data: List of account names for which we need bounds
-        :return: List of bounds
+        :return: Array of bounds with one (lower, upper) row per holding
         """
-        num_holdings = len(df.index)
-        bounds = [(0, 0)] * num_holdings
-        for acct in accounts:
-            holdings = df.loc[(df['account_name'] == acct)]
-            for holding in holdings.index:
-                if df.iloc[holding]['asset_class'] == investment.AssetClass.CASH:
-                    bounds[holding] = (-df.iloc[holding]['value'],
-                                       _JITTER - df.iloc[holding]['value'])
-                    continue
-                cash = _get_cash(df, acct)
-                share_price = df.iloc[holding]['share_price']
-                upper_bound = cash / share_price
-                bounds[holding] = (0, upper_bound)
-
+        bounds = np.zeros((len(df.index), 2))
+        values = df['value'].to_numpy(dtype=np.float64)
+        inv_prices = _reciprocal(df['share_price'].to_numpy(dtype=np.float64))
+        is_cash = (df['asset_class'] == investment.AssetClass.CASH).to_numpy()
+        acct_ids, acct_names = pd.factorize(df['account_name'])
+        cash_per_acct = _get_cash_by_account(df).reindex(acct_names, fill_value=0).to_numpy(dtype=np.float64)
+        bounds[:, 0], bounds[:, 1] = _fill_bounds(values, inv_prices, is_cash, acct_ids, cash_per_acct, _JITTER)
+        bounds[~df['account_name'].isin(accounts).to_numpy()] = 0
         return bounds
 
 
 class RebalanceAllocationStrategy(Strategy):
     """Applied to re-balancing assets within an account, typically non-taxable data."""
 
-    def initial_allocation(self, df: pd.DataFrame, _: List[str]) -> np.ndarray:
+    def initial_allocation(self, df: pd.DataFrame, _: Collection[str]) -> np.ndarray:
         """
         Gets an initial allocation of funds within an account to specific holdings.
 
@@ -201,24 +245,25 @@ class RebalanceAllocationStrategy(Strategy):
         num_holdings = len(df.index)
         return np.zeros(num_holdings)
 
-    def bounds(self, df: pd.DataFrame, accounts: List[str]) -> List[Tuple[float, float]]:
+    def bounds(self, df: pd.DataFrame, accounts: Collection[str]) -> np.ndarray:
         """
         Gets the bounds on a per holding basis for the potential calculated transactions.
 
         For non-taxable data, the lower bound is the total number of shares and the upper bound
         is the total account value / share price
         :param: df: Portfolio in a Pandas DataFrame format
-        :return: Bounds on a per holding basis.
+        :return: Bounds on a per holding basis, one (lower, upper) row per holding.
         """
-        num_holdings = len(df.index)
-        bounds = [(0, _JITTER)] * num_holdings
+        bounds = _default_bounds(len(df.index))
+        values = df['value'].to_numpy()
+        prices = df['share_price'].to_numpy()
+        num_shares = df['num_shares'].to_numpy()
+        acct_idx = df.groupby('account_name', sort=False, observed=True).indices
         for acct in accounts:
-            holdings = df.loc[(df.account_name == acct)]
-            account_value = holdings.value.agg('sum')
-            if len(holdings.index) <= 1:
+            holdings = acct_idx.get(acct)
+            if holdings is None or len(holdings) <= 1:
                 continue
-            for holding in holdings.index:
-                available = account_value - df.loc[holding].value
-                bounds[holding] = (-df.iloc[holding].num_shares,
-                                   available / df.loc[holding].share_price)
+            available = values[holdings].sum() - values[holdings]
+            bounds[holdings, 0] = -num_shares[holdings]
+            bounds[holdings, 1] = available / prices[holdings]
         return bounds
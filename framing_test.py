@@ -100,6 +100,22 @@ class ContextTest(unittest.TestCase):
         initial_allocation = framing_context.get_initial_allocation(self._df, self._accounts)
         self.assertCountEqual(initial_allocation, expected_allocation)
 
+    def test_get_initial_allocation_cash_only_account(self):
+        add_holding = {'account_name': 'BROKERAGE',
+                       'institution': 'Fidelity',
+                       'fund_name': 'Money Market',
+                       'asset_class': investment.AssetClass.CASH,
+                       'ticker_symbol': 'CASH',
+                       'share_price': 1,
+                       'num_shares': 1000,
+                       'value': 1000}
+        self._df = pd.concat([self._df, pd.DataFrame([add_holding])], ignore_index=True)
+        expected_allocation = np.zeros(len(self._df.index))
+        expected_allocation[1] = 500
+        expected_allocation[2] = -5000
+        initial_allocation = framing.CashAllocationStrategy().initial_allocation(self._df, ['Joint WROS', 'BROKERAGE'])
+        np.testing.assert_array_equal(initial_allocation, expected_allocation)
+
     def test_get_initial_allocation_non_taxable_strategy(self):
         expected_allocation = np.zeros(len(self._df.index))
         framing_context = framing.Context(non_taxable=framing.RebalanceAllocationStrategy())
@@ -110,7 +126,7 @@ class ContextTest(unittest.TestCase):
         expected_bounds = [(0, framing._JITTER)] * len(self._df.index)
         framing_context = framing.Context()
         bounds = framing_context.get_allocation_bounds(self._df, self._accounts)
-        self.assertCountEqual(bounds, expected_bounds)
+        np.testing.assert_array_equal(bounds, expected_bounds)
 
     def test_get_allocation_bounds_taxable_strategy(self):
         expected_bounds = [(0, framing._JITTER)] * len(self._df.index)
@@ -119,13 +135,13 @@ class ContextTest(unittest.TestCase):
         expected_bounds[2] = (-5000, -5000 + framing._JITTER)
         framing_context = framing.Context(taxable=framing.CashAllocationStrategy())
         allocation_bounds = framing_context.get_allocation_bounds(self._df, self._accounts)
-        self.assertCountEqual(allocation_bounds, expected_bounds)
+        np.testing.assert_array_equal(allocation_bounds, expected_bounds)
 
     def test_get_allocation_bounds_non_taxable_strategy_single_holding(self):
         expected_bounds = [(0, framing._JITTER)] * len(self._df.index)
         framing_context = framing.Context(non_taxable=framing.RebalanceAllocationStrategy())
         allocation_bounds = framing_context.get_allocation_bounds(self._df, self._accounts)
-        self.assertCountEqual(allocation_bounds, expected_bounds)
+        np.testing.assert_array_equal(allocation_bounds, expected_bounds)
 
     def test_get_allocation_bounds_non_taxable_strategy_multiple_holdings(self):
         add_holding = {'account_name': 'INDIVIDUAL IRA',
@@ -136,13 +152,13 @@ class ContextTest(unittest.TestCase):
                         'share_price': 10,
                         'num_shares': 1000,
                         'value': 10000}
-        self._df = self._df.append(add_holding, ignore_index=True)
+        self._df = pd.concat([self._df, pd.DataFrame([add_holding])], ignore_index=True)
         expected_bounds = [(0, framing._JITTER)] * len(self._df.index)
         expected_bounds[3] = (-2000, 1000)
         expected_bounds[4] = (-1000, 2000)
         framing_context = framing.Context(non_taxable=framing.RebalanceAllocationStrategy())
         allocation_bounds = framing_context.get_allocation_bounds(self._df, self._accounts)
-        self.assertCountEqual(allocation_bounds, expected_bounds)
+        np.testing.assert_array_equal(allocation_bounds, expected_bounds)
 
 
 if __name__ == '__main__':
@@ -19,6 +19,8 @@ from dataclasses import dataclass
 import math
 from typing import Text, Dict
 
+import numpy as np
+
 
 @enum.unique
 @functools.total_ordering
@@ -37,12 +39,10 @@ class AssetClass(enum.Enum):
     EMERGING_MARKETS = enum.auto()
     CASH = enum.auto()
 
-    _fixed_income = (INVESTMENT_GRADE_BONDS, HIGH_YIELD_BONDS, INFLATION_PROTECTED_BONDS)
-
     @property
     def is_fixed_income(self) -> bool:
         """Returns a boolean value indicating if the class is a fixed-income investment."""
-        return self in self._fixed_income
+        return self in _FIXED_INCOME
 
     def __str__(self):
         return self.name
@@ -53,6 +53,11 @@ class AssetClass(enum.Enum):
         return NotImplemented
 
 
+# Declared outside the enum body so it does not become a member itself
+_FIXED_INCOME = frozenset({AssetClass.INVESTMENT_GRADE_BONDS, AssetClass.HIGH_YIELD_BONDS,
+                           AssetClass.INFLATION_PROTECTED_BONDS})
+
+
 @dataclass(frozen=True)
 class Fund:
     ticker_symbol: Text
@@ -77,8 +82,27 @@ LOOKUP: Dict[str, AssetClass] = dict(VFFSX=AssetClass.CORE_US,
                                      VWO=AssetClass.EMERGING_MARKETS,
                                      CASH=AssetClass.CASH)
 
+# LOOKUP as sorted ticker symbols alongside the values of their asset classes, for lookup_many
+_LOOKUP_TICKERS_SORTED = np.array(sorted(LOOKUP))
+_LOOKUP_CODES_SORTED = np.array([LOOKUP[ticker].value for ticker in _LOOKUP_TICKERS_SORTED], dtype=np.int32)
+# Asset classes indexed by value, with None in place of the unknown value 0
+_ASSET_CLASS_BY_VALUE = np.array([None] + list(AssetClass), dtype=object)
+
+
+def lookup_many(ticker_symbols: np.ndarray) -> np.ndarray:
+    """Gets the value of the asset class of every ticker symbol in LOOKUP, and 0 for every other symbol."""
+    ticker_symbols = np.asarray(ticker_symbols).astype(str)
+    positions = np.searchsorted(_LOOKUP_TICKERS_SORTED, ticker_symbols).clip(max=len(_LOOKUP_TICKERS_SORTED) - 1)
+    return np.where(_LOOKUP_TICKERS_SORTED[positions] == ticker_symbols, _LOOKUP_CODES_SORTED[positions], 0)
+
+
+def asset_classes_of(codes: np.ndarray) -> np.ndarray:
+    """Gets the asset classes with the values returned by lookup_many, as an object array."""
+    return _ASSET_CLASS_BY_VALUE[codes]
+
 
 class Investment:
+    __slots__ = ('_fund', '_ticker_symbol', '_num_shares', '_share_price')
 
     def __init__(self, ticker_symbol: Text, asset_class: AssetClass, name: Text,
                  num_shares: int = 0, share_price: float = None):
@@ -45,6 +45,18 @@ class InvestmentTest(unittest.TestCase):
     def test_value(self):
         self.assertEqual(self._investment.value, 40.0*5)
 
+    def test_lookup_many(self):
+        codes = investment.lookup_many(['VNQ', 'MISSING', 'CASH', 'FSKAX'])
+        self.assertEqual(list(codes), [investment.AssetClass.REAL_ESTATE.value, 0, investment.AssetClass.CASH.value,
+                                       investment.AssetClass.CORE_US.value])
+        self.assertEqual(list(investment.asset_classes_of(codes[[0, 2]])),
+                         [investment.AssetClass.REAL_ESTATE, investment.AssetClass.CASH])
+
+    def test_is_fixed_income(self):
+        self.assertEqual(len(investment.AssetClass), 13)
+        self.assertTrue(investment.AssetClass.HIGH_YIELD_BONDS.is_fixed_income)
+        self.assertFalse(investment.AssetClass.CORE_US.is_fixed_income)
+
 
 if __name__ == '__main__':
     unittest.main()
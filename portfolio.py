@@ -13,14 +13,14 @@
 # limitations under the License.
 
 """Represents a collection of holdings segregated by account"""
-import collections
 import copy
 import dataclasses
 import framing
 import functools
 import json
 import math
-from typing import List, Text
+import os
+from typing import List, Optional, Text, Tuple
 
 import numpy as np
 import pandas as pd
@@ -29,74 +29,146 @@ from scipy import optimize
 
 import account
 import allocation
+import investment
 
+_COLUMNS = ['account_name', 'institution', 'fund_name', 'asset_class', 'ticker_symbol', 'share_price',
+            'num_shares', 'value']
+# Low cardinality columns stored as pd.Categorical
+_CATEGORICAL_COLUMNS = ['account_name', 'asset_class']
+# Shared by every allocation indexed by asset class, in the order AssetClass sorts
+_ASSET_CLASS_DTYPE = pd.CategoricalDtype(list(investment.AssetClass))
+# Penalty on the per-account cash-neutrality residual in each least squares step of the method of multipliers
+_EQUALITY_PENALTY = 100.0
+_MAX_EQUALITY_PENALTY = 1e8
+# Largest net change in an account's value, in percentage points of the portfolio, accepted from least squares
+_EQUALITY_TOLERANCE = 1e-9
+# Multiplier updates allowed before least squares gives up and SLSQP is used instead
+_MAX_MULTIPLIER_UPDATES = 100
 
-def _get_percentage_allocation(current_df: pd.DataFrame) -> pd.DataFrame:
+
+def _group_index(labels, column: Text) -> pd.Index:
+    """Labels groups of the column. Asset classes are categorical with _ASSET_CLASS_DTYPE, all else plain objects."""
+    return pd.Index(labels, dtype=_ASSET_CLASS_DTYPE if column == 'asset_class' else object, name=column)
+
+
+def _sum_by_codes(codes: np.ndarray, uniques: np.ndarray, values: np.ndarray, column: Text) -> pd.DataFrame:
     """
-    Gets the percentage allocation by asset class
-    :param target:
-    :return:
+    Sums the value of the holdings grouped by column, given the factorized column of every holding.
+
+    Groups are sorted and labelled by _group_index.
     """
-    current_allocation = current_df.groupby(['asset_class'])['value'].agg('sum').to_frame()
+    sums = np.bincount(codes, weights=values, minlength=len(uniques))
+    return pd.DataFrame({'value': sums}, index=_group_index(uniques, column)).sort_index()
+
+
+def _percent_alloc_np(ac_codes: np.ndarray, values: np.ndarray, num_asset_classes: int) -> np.ndarray:
+    """Gets the percentage of the total value held in each asset class, given the asset class code of each value."""
+    sums = np.bincount(ac_codes, weights=values, minlength=num_asset_classes)
+    return sums * (100.0 / sums.sum())
+
+
+def _add_percentage(current_allocation: pd.DataFrame) -> pd.DataFrame:
+    """Adds the fraction and percentage of the net value held by each asset class."""
     net_value = current_allocation.value.sum()
     current_allocation['fraction'] = current_allocation['value'] / net_value
     current_allocation['percentage'] = current_allocation['fraction'] * 100
     return current_allocation
 
 
-def _get_diff_from_target(current_df: pd.DataFrame,
-                          target: allocation.Target) -> pd.Series:
+def _rmse_and_grad(x: np.ndarray, base_shares: np.ndarray, prices: np.ndarray, ac_index: np.ndarray,
+                   tgt: np.ndarray) -> Tuple[float, np.ndarray]:
     """
-    Gets the absolute difference in percentage allocation from the target.
-    :param target:
-    :return:
-    """
-    current_allocation = _get_percentage_allocation(current_df)
-    target_df: pd.DataFrame = target.dataframe
-    difference_series = target_df[0].sub(current_allocation['percentage'].astype(float), fill_value=0)
-    difference_series.index.name = 'asset_class'
-    return difference_series
-
-
-def _objective_fn(initial: pd.DataFrame, target: pd.DataFrame, x: List[int]) -> float:
-    """
-    Objective function for use in calculation of the optimal cash allocation
-    """
-    results = initial.copy()
-    results['num_shares'] = results['num_shares'].astype(float) + x
-    results['value'] = results['num_shares'].astype(float) * results['share_price'].astype(float)
-    logging.debug('_objective_fn(%s)', x)
-    logging.debug('_objective_fn: result %f', _get_rmse(results, target))
-    return _get_rmse(results, target)
-
-
-def _get_rmse(current_df: pd.DataFrame, target: pd.DataFrame) -> float:
-    """Calculates root mean squared error between target and actual allocation.
+    Gets the root mean squared error between the target and the allocation after changing shares by x, along with
+    its gradient.
 
     Args:
-        target: Target allocation by asset class and percentage allocation
-        actual: Actual allocation by asset class and percentage allocation
+        x: Change in the number of shares of each holding
+        base_shares: Current number of shares of each holding
+        prices: Share price of each holding
+        ac_index: Position of each holding's asset class within tgt
+        tgt: Target percentage allocation by asset class
 
     Returns:
-        Root Mean Square error
+        Root Mean Square error and its gradient with respect to x
     """
-    difference_series = _get_diff_from_target(current_df, target)
-    square_error = difference_series ** 2
-    result: float = square_error.sum() / len(square_error.index)
-    return math.sqrt(result)
+    values = (base_shares + x) * prices
+    total = values.sum()
+    pct = _percent_alloc_np(ac_index, values, len(tgt))
+    diff = tgt - pct
+    rmse = math.sqrt((diff * diff).mean())
+    if rmse == 0:
+        return rmse, np.zeros_like(values)
+    # d(pct_k)/d(x_j) = 100 * price_j / total * ([k == ac(j)] - pct_k / 100)
+    grad = -100.0 * prices / (total * len(tgt) * rmse) * (diff[ac_index] - diff @ pct / 100.0)
+    return rmse, grad
+
+
+def _holding_arrays(holdings: List[investment.Investment]) -> account.HoldingArrays:
+    """Lays out a list of holdings as one array per attribute, like Account.holdings_arrays."""
+    funds = [holding.fund for holding in holdings]
+    return account.HoldingArrays(
+        fund_names=np.array([fund.name for fund in funds], dtype=object),
+        asset_classes=np.array([fund.asset_class for fund in funds], dtype=object),
+        ticker_symbols=np.array([fund.ticker_symbol for fund in funds], dtype=object),
+        share_prices=np.fromiter((fund.share_price for fund in funds), dtype=np.float64, count=len(funds)),
+        num_shares=np.fromiter((holding.num_shares for holding in holdings), dtype=np.float64,
+                               count=len(holdings)))
+
+
+def _layout_holdings(accounts: List[account.Account], arrays: List[account.HoldingArrays]) -> pd.DataFrame:
+    """Lays out the holdings of every account as the rows of a portfolio DataFrame, given each account's arrays."""
+    def concatenate(field: Text, dtype) -> np.ndarray:
+        return np.concatenate([getattr(acct_arrays, field) for acct_arrays in arrays]) if arrays \
+            else np.empty(0, dtype=dtype)
+
+    lengths = [len(acct_arrays.num_shares) for acct_arrays in arrays]
+    share_prices = concatenate('share_prices', np.float64)
+    num_shares = concatenate('num_shares', np.float64)
+    return pd.DataFrame({'account_name': np.repeat(np.array([acct.name for acct in accounts], dtype=object), lengths),
+                         'institution': np.repeat(np.array([acct.institution for acct in accounts], dtype=object),
+                                                  lengths),
+                         'fund_name': concatenate('fund_names', object),
+                         'asset_class': concatenate('asset_classes', object),
+                         'ticker_symbol': concatenate('ticker_symbols', object),
+                         'share_price': share_prices,
+                         'num_shares': num_shares,
+                         'value': num_shares * share_prices},
+                        columns=_COLUMNS, copy=False)
+
+
+def _file_stamp(filename: Text) -> Tuple[Text, int, int]:
+    """Identifies the current contents of a file by its absolute path, modification time and size."""
+    stat = os.stat(filename)
+    return os.path.abspath(filename), stat.st_mtime_ns, stat.st_size
 
 
 def build_portfolio(filename: Text) -> 'Portfolio':
-    accounts = []
+    """
+    Builds the portfolio of the accounts described in a JSON file.
+
+    Builds are memoized on the account descriptions and on the stamps of the account files they name, so changing
+    any of them, or the directory the account files resolve against, builds afresh. Every call gets its own copy.
+    """
     with open(filename, mode='r', encoding='utf8') as accounts_file:
-        account_num = 0
         account_descs = json.load(accounts_file)
-        for account_desc in account_descs:
-            account_num += 1
-            logging.info('Account Number %d,contents: %s', account_num, account_desc)
-            accounts.append(account.Account(account_desc))
-        logging.info('Processed %d data', account_num)
-    return Portfolio(accounts)
+    account_stamps = tuple(_file_stamp(os.path.join(account.ACCOUNT_SUBDIR, account_desc['filename']))
+                           for account_desc in account_descs)
+    # Serialized, so the descriptions can be part of the memo key
+    account_texts = tuple(json.dumps(account_desc, sort_keys=True) for account_desc in account_descs)
+    return _load_portfolio(account_texts, account_stamps)._copy()
+
+
+@functools.lru_cache(maxsize=16)
+def _load_portfolio(account_texts: Tuple[Text, ...],
+                    unused_account_stamps: Tuple[Tuple[Text, int, int], ...]) -> 'Portfolio':
+    accounts = []
+    for account_num, account_text in enumerate(account_texts, start=1):
+        account_desc = json.loads(account_text)
+        logging.info('Account Number %d,contents: %s', account_num, account_desc)
+        accounts.append(account.Account(account_desc))
+    logging.info('Processed %d data', len(accounts))
+    df = _layout_holdings(accounts, [acct.holdings_arrays for acct in accounts])
+    return Portfolio._from_dataframe(accounts, df)
 
 
 @dataclasses.dataclass(frozen=True)
@@ -115,84 +187,185 @@ class ResultError(Exception):
     pass
 
 
+def _refreshed(method):
+    """Decorates Portfolio methods that read the holdings, so holdings added since the last read are included."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._stale:
+            self._build_dataframe()
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _versioned_cache(method):
+    """Caches the DataFrame returned by a Portfolio accessor until the holdings change; callers get a copy."""
+    @functools.wraps(method)
+    def wrapper(self):
+        key = (method.__name__, self._df_version)
+        if key not in self._cache:
+            self._cache[key] = method(self)
+        return self._cache[key].copy()
+    return wrapper
+
+
 class Portfolio:
 
     def __init__(self, accounts: List[account.Account]):
         self._accounts = accounts
+        self._df_version = 0
         self._build_dataframe()
 
+    @classmethod
+    def _from_dataframe(cls, accounts: List[account.Account], df: pd.DataFrame) -> 'Portfolio':
+        """Creates a portfolio whose holdings have already been laid out as a DataFrame."""
+        result = cls.__new__(cls)
+        result._accounts = accounts
+        result._df_version = 0
+        result._set_dataframe(df)
+        return result
+
     def _build_dataframe(self):
-        # Build pd.DataFrame from the data
-        columns = ['account_name', 'institution', 'fund_name', 'asset_class', 'ticker_symbol', 'share_price',
-                   'num_shares', 'value']
-        self._df = pd.DataFrame(columns=columns)
-        num_holdings: int = 0
-        for acc in self._accounts:
-            for holding in acc.holdings:
-                fund = holding.fund
-                self._df.loc[num_holdings] = [
-                    acc.name, acc.institution, fund.name, fund.asset_class, fund.ticker_symbol,
-                    float(fund.share_price), float(holding.num_shares), float(holding.value)
-                ]
-                num_holdings += 1
-        self._num_holdings = num_holdings
-        self._allocation = self._df.groupby(['asset_class'])['value'].agg('sum').to_frame()
+        arrays = [_holding_arrays(acc.holdings) for acc in self._accounts]
+        self._set_dataframe(_layout_holdings(self._accounts, arrays))
+
+    def _set_dataframe(self, df: pd.DataFrame):
+        self._stale = False
+        self._bump_version()
+        self._df = df.astype({column: 'category' for column in _CATEGORICAL_COLUMNS})
+        self._share_prices = self._df['share_price'].to_numpy()
+        self._num_shares = self._df['num_shares'].to_numpy()
+        self._num_holdings = len(df.index)
+        # An account may hold the same fund in several rows; transactions apply to each of them
+        self._index_of = {}
+        for row, key in enumerate(zip(df['account_name'], df['fund_name'])):
+            self._index_of.setdefault(key, []).append(row)
+        codes, uniques = pd.factorize(self._df['asset_class'].to_numpy(), sort=False)
+        self._ac_codes = codes.astype(np.int32)
+        self._ac_uniques = uniques
+        self._ac_to_idx = {asset_class: code for code, asset_class in enumerate(uniques)}
+        codes, uniques = pd.factorize(self._df['institution'].to_numpy(), sort=False)
+        self._inst_codes = codes.astype(np.int32)
+        self._inst_uniques = uniques
+        # Depends only on the accounts and share prices, which execute leaves alone
+        self._linear_constraint = self._get_linear_constraint()
+        self._allocation = self.get_allocation_by_asset_class()
+        self._net_value = self._df.value.sum()
+
+    def _copy(self) -> 'Portfolio':
+        """
+        Gets a copy of this portfolio whose holdings can be changed without changing this one.
+
+        Shallow copies of the accounts suffice, as holdings are replaced rather than modified.
+        """
+        result = copy.copy(self)
+        result._accounts = [copy.copy(accnt) for accnt in self._accounts]
+        return result
+
+    def _bump_version(self):
+        """Records a change to the holdings. The cache is replaced, not cleared, as copies of a portfolio share it."""
+        self._df_version += 1
+        self._cache = {}
+
+    def _set_num_shares(self, num_shares: np.ndarray):
+        """Replaces the number of shares of every holding, keeping everything else about the holdings."""
+        self._bump_version()
+        self._df = self._df.assign(num_shares=num_shares, value=num_shares * self._share_prices)
+        self._num_shares = self._df['num_shares'].to_numpy()
+        self._allocation = self.get_allocation_by_asset_class()
         self._net_value = self._df.value.sum()
 
+    @_refreshed
     def __str__(self):
         return self._df.to_string()
 
     def __eq__(self, other: 'Portfolio'):
-        return self._df.equals(other._df)
+        if not isinstance(other, Portfolio):
+            return NotImplemented
+        return self.equals(other)
 
-    def _get_linear_constraint(self) -> 'optimize.LinearConstraint':
-        account_number = 0
-        curr_account = self._df.iloc[0]['account_name']
-        coefficients = [[0]*self._num_holdings]
-        coefficients[account_number][0] = self._df.iloc[0]['share_price']
-        num_accounts = len(self._df['account_name'].unique())
-        bound = [0] * num_accounts
-        for row_number in self._df.index[1:]:
-            new_account = self._df.iloc[row_number]['account_name']
-            if new_account != curr_account:
-                curr_account = new_account
-                account_number += 1
-                coefficients.append([0] * self._num_holdings)
-            coefficients[account_number][row_number] = self._df.iloc[row_number]['share_price']
-        return optimize.LinearConstraint(np.array(coefficients), bound, bound)
+    @_refreshed
+    def equals(self, other: 'Portfolio', atol: float = 1e-9) -> bool:
+        """
+        Checks whether two portfolios hold the same funds in the same accounts, in the same order.
+
+        Share counts may differ by up to atol; everything else must match exactly.
+        """
+        if other._stale:
+            other._build_dataframe()
+        if self._num_holdings != other._num_holdings:
+            return False
+        return (np.array_equal(self._share_prices, other._share_prices)
+                and np.allclose(self._num_shares, other._num_shares, rtol=0, atol=atol)
+                and np.array_equal(self._ac_codes, other._ac_codes)
+                and np.array_equal(self._ac_uniques, other._ac_uniques)
+                and all(np.array_equal(self._df[column].to_numpy(), other._df[column].to_numpy())
+                        for column in ('ticker_symbol', 'fund_name', 'account_name', 'institution')))
+
+    def add_holding(self, accnt: account.Account, holding: investment.Investment):
+        """
+        Adds a holding to one of the accounts in this portfolio, or to a new account.
+
+        The DataFrame is rebuilt the next time the holdings are read, so adding several
+        holdings in a row costs a single rebuild.
+        """
+        if not any(accnt is existing for existing in self._accounts):
+            self._accounts = [*self._accounts, accnt]
+        accnt.holdings = [*accnt.holdings, holding]
+        self._stale = True
 
+    def _get_linear_constraint(self) -> 'optimize.LinearConstraint':
+        # One row per account (in order of appearance): the net value of the account's transactions is zero
+        account_idx, account_names = pd.factorize(self._df['account_name'].to_numpy(), sort=False)
+        prices = self._df['share_price'].to_numpy(dtype=np.float64)
+        coefficients = np.zeros((len(account_names), self._num_holdings))
+        coefficients[account_idx, np.arange(self._num_holdings)] = prices
+        bound = np.zeros(len(account_names))
+        return optimize.LinearConstraint(coefficients, bound, bound)
+
+    @_refreshed
+    @_versioned_cache
     def get_allocation_by_asset_class(self) -> pd.DataFrame:
         """
         Gets the allocations by asset class in this portfolio
 
         :return: pd.DataFrame
         """
-        return self._df.groupby(['asset_class'])['value'].agg('sum').to_frame()
+        return _sum_by_codes(self._ac_codes, self._ac_uniques, self._df['value'].to_numpy(), 'asset_class')
 
+    @_refreshed
+    @_versioned_cache
     def get_allocation_by_institution(self) -> pd.DataFrame:
         """
         Gets the allocations by asset class in this portfolio
 
         :return: pd.DataFrame
         """
-        return self._df.groupby(['institution'])['value'].agg('sum').to_frame()
+        return _sum_by_codes(self._inst_codes, self._inst_uniques, self._df['value'].to_numpy(), 'institution')
 
+    @_refreshed
     def get_difference_from_target(self, target: pd.DataFrame) -> pd.Series:
         """
         Gets the difference in asset allocation from the target asset allocation.
         :param target:
         :return:
         """
-        return _get_diff_from_target(self._df, target)
-
+        tgt, labels = self._target_vector(target)
+        current = _percent_alloc_np(self._ac_codes, self._df['value'].to_numpy(), len(tgt))
+        order = sorted(range(len(labels)), key=labels.__getitem__)
+        index = pd.Index([labels[position] for position in order], dtype=object, name='asset_class')
+        return pd.Series((tgt - current)[order], index=index)
+
+    @_refreshed
+    @_versioned_cache
     def get_percentage_allocation(self) -> pd.DataFrame:
         """
         Gets the percentage allocation by asset class.
         :param self:
         :return:
         """
-        return _get_percentage_allocation(self._df)
+        return _add_percentage(self.get_allocation_by_asset_class())
 
+    @_refreshed
     def allocate_cash(self, target: pd.DataFrame) -> pd.DataFrame:
         """
         Gets the optimal cash ollocation for the portfolio
@@ -203,6 +376,7 @@ class Portfolio:
         framing_context = framing.Context(taxable=framing.CashAllocationStrategy())
         return self._optimize_allocation(framing_context, target)
 
+    @_refreshed
     def tune(self, target: pd.DataFrame) -> pd.DataFrame:
         """
         Re-balances tax advantaged data and allooctes cash for taxable data
@@ -214,30 +388,118 @@ class Portfolio:
                                           non_taxable=framing.RebalanceAllocationStrategy())
         return self._optimize_allocation(framing_context, target)
 
+    def _least_squares_allocation(self, bounds: np.ndarray, tgt: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Minimizes the distance to the target allocation as a bounded linear least squares problem.
+
+        Every account's transactions are cash-neutral, so the net value of the portfolio does not change
+        and the percentage allocation is linear in the change in shares. The problem is solved in percentage
+        points of the portfolio moved into each holding, where the cash-neutrality constraints are enforced
+        exactly by the method of multipliers: each step is a bounded least squares problem penalizing the
+        constraint residual, after which the residual is added to the multipliers.
+
+        Holdings whose bounds are no wider than the framing jitter, and unpriced holdings, are fixed rather
+        than solved for.
+
+        Returns:
+            The change in shares of every holding, or None if the constraints are not met
+        """
+        net_value = self._net_value
+        if self._num_holdings == 0 or net_value <= 0:
+            return None
+        current_pct = _percent_alloc_np(self._ac_codes, self._df['value'].to_numpy(), len(tgt))
+        # Percentage points of the portfolio per share of each holding
+        scale = self._share_prices * (100.0 / net_value)
+        priced = scale > 0
+        free = priced & (bounds[:, 1] - bounds[:, 0] > 2 * framing._JITTER)
+        with np.errstate(invalid='ignore'):
+            lower = bounds[:, 0] * scale
+            upper = bounds[:, 1] * scale
+        moved = np.where(priced, lower, 0.)
+        design = np.zeros((len(tgt), self._num_holdings))
+        design[self._ac_codes, np.arange(self._num_holdings)] = 1.
+        # Account membership of every priced holding
+        accounts = (self._linear_constraint.A != 0).astype(np.float64)
+        target_gap = tgt - current_pct - design[:, ~free] @ moved[~free]
+        account_gap = -accounts[:, ~free] @ moved[~free]
+        if free.any():
+            penalty = _EQUALITY_PENALTY
+            multipliers = np.zeros(len(account_gap))
+            previous_residual = np.inf
+            # BVLS stops after as many iterations as variables by default, often just short of converging
+            max_iter = 10 * int(free.sum())
+            for _ in range(_MAX_MULTIPLIER_UPDATES):
+                root_penalty = math.sqrt(penalty)
+                solution = optimize.lsq_linear(np.vstack([design[:, free], root_penalty * accounts[:, free]]),
+                                               np.concatenate([target_gap, root_penalty * (account_gap - multipliers)]),
+                                               bounds=(lower[free], upper[free]), method='bvls', tol=1e-12,
+                                               max_iter=max_iter)
+                if solution.status <= 0:
+                    return None
+                residual = accounts[:, free] @ solution.x - account_gap
+                multipliers += residual
+                largest_residual = np.abs(residual).max()
+                if largest_residual <= _EQUALITY_TOLERANCE:
+                    break
+                # Stiffen the penalty when the multipliers alone are not closing the residual quickly enough,
+                # short of making the steps ill-conditioned
+                if largest_residual > 0.25 * previous_residual and penalty < _MAX_EQUALITY_PENALTY:
+                    penalty *= 10
+                    multipliers /= 10
+                previous_residual = largest_residual
+            moved[free] = solution.x
+        if np.abs(accounts @ moved).max() > _EQUALITY_TOLERANCE:
+            return None
+        x = np.zeros(self._num_holdings)
+        x[priced] = moved[priced] / scale[priced]
+        return x
+
+    def _target_vector(self, target: allocation.Target) -> Tuple[np.ndarray, List[investment.AssetClass]]:
+        """
+        Gets the target percentage allocation indexed by asset class code, along with the asset class at each code.
+
+        Asset classes only present in the target are placed after those held, in target order.
+        """
+        target_pct = target.dataframe[0]
+        position = dict(self._ac_to_idx)
+        for asset_class in target_pct.index:
+            position.setdefault(asset_class, len(position))
+        tgt = np.zeros(len(position))
+        tgt[[position[asset_class] for asset_class in target_pct.index]] = target_pct.to_numpy()
+        return tgt, list(position)
+
     def _optimize_allocation(self, framing_context, target):
         bnds = framing_context.get_allocation_bounds(self._df, self._accounts)
         x0 = framing_context.get_initial_allocation(self._df, self._accounts)
-        logging.info('Initial objective fn value: %f', _objective_fn(self._df, target, x0))
-        cons = [self._get_linear_constraint()]
-        solution = optimize.minimize(functools.partial(_objective_fn, self._df, target),
-                                     x0, method='SLSQP', bounds=bnds, constraints=cons, tol=1e-10,
-                                     options={'maxiter': 200})
-        if not solution.success:
-            raise ResultError(f"Cash allocation failed: {solution.message}")
+        tgt, _ = self._target_vector(target)
+        obj = functools.partial(_rmse_and_grad,
+                                base_shares=self._df['num_shares'].to_numpy(dtype=np.float64),
+                                prices=self._df['share_price'].to_numpy(dtype=np.float64),
+                                ac_index=self._ac_codes, tgt=tgt)
+        if logging.level_info():
+            logging.info('Initial objective fn value: %f', obj(x0)[0])
+        x = self._least_squares_allocation(bnds, tgt)
+        if x is None:
+            logging.info('Least squares allocation failed, falling back to SLSQP')
+            cons = [self._linear_constraint]
+            solution = optimize.minimize(obj, x0, jac=True, method='SLSQP', bounds=bnds, constraints=cons,
+                                         options={'maxiter': 200, 'ftol': 1e-10})
+            if not solution.success:
+                raise ResultError(f"Cash allocation failed: {solution.message}")
+            x = solution.x
+        fund_names = self._df['fund_name'].to_numpy()
+        account_names = self._df['account_name'].to_numpy()
+        institutions = self._df['institution'].to_numpy()
         result = []
-        for holding in range(len(solution.x)):
-            logging.info('Cash allocation: %f shares of %s from account %s held at %s', round(solution.x[holding], 2),
-                         self._df.iloc[holding]['fund_name'], self._df.iloc[holding]['account_name'],
-                         self._df.iloc[holding]['institution'])
-            if abs(solution.x[holding]) > 1e-02:
-                institution = self._df.iloc[holding]['institution']
-                account_name = self._df.iloc[holding]['account_name']
-                fund_name = self._df.iloc[holding]['fund_name']
-                result.append(Transaction(institution, account_name, fund_name,
-                                          round(solution.x[holding], 2)))
-        logging.info('Final objective fn value: %f', _objective_fn(self._df, target, solution.x))
+        for holding in np.flatnonzero(np.abs(x) > 1e-02):
+            result.append(Transaction(institutions[holding], account_names[holding], fund_names[holding],
+                                      round(x[holding], 2)))
+        if logging.level_info():
+            logging.info('Cash allocation:\n%s\nFinal objective fn value: %f',
+                         '\n'.join(str(transaction) for transaction in result), obj(x)[0])
         return result
 
+    @_refreshed
     def execute(self, transactions: List[Transaction], inplace=False) -> 'Portfolio':
         """
         Executes a list of transactions an the current portfolio and optionally returns a copy.
@@ -246,23 +508,25 @@ class Portfolio:
         :param in_place: Make a copy of current portfolio if False
         :return: None or a modified copy of the current portfolio if in_place is set to False
         """
-        transact_map = collections.defaultdict(lambda: collections.defaultdict(float))
+        delta = np.zeros(self._num_holdings)
         for transaction in transactions:
-            transact_map[transaction.account_name][transaction.fund_name] = transaction.num_shares
-        account_list = self._accounts if inplace else copy.deepcopy(self._accounts)
-        for accnt in account_list:
+            rows = self._index_of.get((transaction.account_name, transaction.fund_name))
+            if rows is not None:
+                delta[rows] += transaction.num_shares
+        new_shares = self._num_shares + delta
+        result = self if inplace else self._copy()
+        # Holdings are replaced rather than modified, and only in accounts with transactions
+        start = 0
+        for accnt in result._accounts:
             holdings = accnt.holdings
-            for holding in holdings:
-                holding.num_shares = holding.num_shares + transact_map[accnt.name][holding.fund.name]
-            accnt.holdings = holdings
-
-        if inplace:
-            self._build_dataframe()
-            return self
-        else:
-            return Portfolio(account_list)
-
-
-
-
-
+            stop = start + len(holdings)
+            if delta[start:stop].any():
+                updated = []
+                for holding, num_shares in zip(holdings, new_shares[start:stop].tolist()):
+                    holding = copy.copy(holding)
+                    holding.num_shares = num_shares
+                    updated.append(holding)
+                accnt.holdings = updated
+            start = stop
+        result._set_num_shares(new_shares)
+        return result
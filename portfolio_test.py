@@ -13,38 +13,68 @@
 # limitations under the License.
 
 import account
-import allocation
+import copy
 import investment
 import mock
+import numpy as np
 import pandas as pd
+import types
 import unittest
 import portfolio
 
 
+_DESC_CRISX = 'Small Cap Value Fund Class Institutional'
+_DESC_FSKAX = 'Fidelity Total Market Index'
+_DESC_VNQ = 'Vanguard Real Estate Index Fund'
+_DESC_CASH = 'Money Market'
+_DESC_VWO = 'Vanguard Emerging Markets Index Fund'
+
+_ACCOUNT_DESC = """
+[
+    {
+        "institution": "Fidelity",
+        "name": "Joint WROS",
+        "filename": "Personal_Account_Positions.csv",
+        "taxable": "True",
+        "headers": {
+            "name": "Account Name/Number",
+            "symbol": "Symbol",
+            "description": "Description",
+            "num_shares": "Quantity",
+            "share_price": "Last Price"
+        }
+    }
+]
+"""
+
+# Portfolio labels allocations by asset class with a categorical index over every asset class
+_ASSET_CATEGORIES = pd.CategoricalDtype(list(investment.AssetClass))
+_ASSET_CLASS_INDEX = pd.CategoricalIndex([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP,
+                                          investment.AssetClass.CASH, investment.AssetClass.REAL_ESTATE],
+                                         dtype=_ASSET_CATEGORIES, name='asset_class')
+# Percentage allocation of PortfolioTest's portfolio, before and after executing its transactions
+_EXPECTED_PCT_BASELINE = pd.DataFrame(data={'value': [10000.0, 5000.0, 5000.0, 20000.0],
+                                            'fraction': [0.25, 0.125, 0.125, 0.5],
+                                            'percentage': [25.0, 12.5, 12.5, 50.0]},
+                                      index=_ASSET_CLASS_INDEX)
+_EXPECTED_PCT_POSTEXEC = pd.DataFrame(data={'value': [10000.0, 10000.0, 0.0, 20000.0],
+                                            'fraction': [0.25, 0.25, 0.0, 0.5],
+                                            'percentage': [25.0, 25.0, 0.0, 50.0]},
+                                      index=_ASSET_CLASS_INDEX)
+
+
 class BuildPortolioTest(unittest.TestCase):
 
     def setUp(self):
-        self._account_desc = """
-                             [
-                                 {
-                                    "institution": "Fidelity",
-                                    "name": "Joint WROS",
-                                    "filename": "Personal_Account_Positions.csv",
-                                    "taxable": "True",
-                                    "headers": {
-                                      "name": "Account Name/Number",
-                                      "symbol": "Symbol",
-                                      "description": "Description",
-                                      "num_shares": "Quantity",
-                                      "share_price": "Last Price"
-                                    }
-                                 }
-                            ]
-                            """
+        self._account_desc = _ACCOUNT_DESC
+
+    def tearDown(self):
+        # Builds are memoized across tests otherwise
+        portfolio._load_portfolio.cache_clear()
 
     @mock.patch('account.Account')
     def test_build_portfolio(self, mock_account):
-        test_account = mock.MagicMock(account.Account, autospect=True)
+        test_account = mock.create_autospec(account.Account, instance=True)
         test_account.name = 'Joint WROS'
         test_account.institution = 'Fidelity'
         test_account.account_file = 'Personal_Account_Positions.csv'
@@ -53,190 +83,234 @@ class BuildPortolioTest(unittest.TestCase):
             investment.Investment('CRISX', 'Small Cap Value Fund Inst', 'GOOGLE LLC 401(K) SAVINGS PLAN', 18576.337,
                                   share_price=18.36)]
         test_account.options = [holding.fund for holding in test_account.holdings]
+        test_account.holdings_arrays = account.HoldingArrays(
+            fund_names=np.array(['GOOGLE LLC 401(K) SAVINGS PLAN'], dtype=object),
+            asset_classes=np.array(['Small Cap Value Fund Inst'], dtype=object),
+            ticker_symbols=np.array(['CRISX'], dtype=object),
+            share_prices=np.array([18.36]),
+            num_shares=np.array([18576.337]))
         mock_account.return_value = test_account
-        with mock.patch('portfolio.open', mock.mock_open(read_data=self._account_desc)) as m:
+        # Stamps stand in for the account files, so the test does not depend on the working directory
+        account_mtime_ns = 0
+
+        def stamp(filename):
+            return filename, account_mtime_ns, 0
+
+        with mock.patch('portfolio.open', mock.mock_open(read_data=self._account_desc)), \
+                mock.patch('portfolio._file_stamp', side_effect=stamp):
             actual_portfolio = portfolio.build_portfolio('data/accounts.json')
+            rebuilt_portfolio = portfolio.build_portfolio('data/accounts.json')
+            expected_portfolio = portfolio.Portfolio([test_account])
+            self.assertEqual(actual_portfolio, expected_portfolio)
+            # The rebuild is memoized, but is still a separate copy
+            mock_account.assert_called_once()
+            self.assertEqual(rebuilt_portfolio, expected_portfolio)
+            self.assertIsNot(rebuilt_portfolio, actual_portfolio)
 
-        expected_portfolio = portfolio.Portfolio([test_account])
-        self.assertEqual(actual_portfolio, expected_portfolio)
+            # Touching an account file rebuilds
+            account_mtime_ns = 1
+            portfolio.build_portfolio('data/accounts.json')
+            self.assertEqual(mock_account.call_count, 2)
 
 
 class PortfolioTest(unittest.TestCase):
+    # Moves the Fidelity cash into the small cap fund; the expected result of allocating cash against the baseline
+    _STANDARD_TXNS = frozenset({portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN', _DESC_CRISX, 500),
+                                portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN', _DESC_CASH, -5000)})
+
+    @classmethod
+    def setUpClass(cls):
+        cls._FIDELITY_HOLDINGS_TEMPLATE = (
+            investment.Investment('CRISX', investment.AssetClass.SMALL_CAP, _DESC_CRISX, 500, share_price=10),
+            investment.Investment('FSKAX', investment.AssetClass.CORE_US, _DESC_FSKAX, 1000, share_price=10),
+            investment.Investment('CASH', investment.AssetClass.CASH, _DESC_CASH, 5000, share_price=1))
+        cls._VANGUARD_HOLDINGS_TEMPLATE = (
+            investment.Investment('VNQ', investment.AssetClass.REAL_ESTATE, _DESC_VNQ, 2000, share_price=10),)
+        # Read-only tests share the template holdings directly
+        fidelity_account = types.SimpleNamespace(
+            name='ACME 401(K) SAVINGS PLAN', institution='Fidelity', account_file='Fidelity_Positions.csv',
+            is_taxable=True, holdings=cls._FIDELITY_HOLDINGS_TEMPLATE,
+            options=[holding.fund for holding in cls._FIDELITY_HOLDINGS_TEMPLATE])
+        vanguard_account = types.SimpleNamespace(
+            name='INDIVIDUAL IRA', institution='Vanguard', account_file='Vanguard_Positions.csv', is_taxable=False,
+            holdings=cls._VANGUARD_HOLDINGS_TEMPLATE,
+            options=[holding.fund for holding in cls._VANGUARD_HOLDINGS_TEMPLATE])
+        cls._fidelity_template = fidelity_account
+        cls._vanguard_template = vanguard_account
+        cls._base_portfolio = portfolio.Portfolio([fidelity_account, vanguard_account])
+        cls._baseline_pct_alloc = cls._base_portfolio.get_percentage_allocation()
+        cls._baseline_index = pd.Index([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP,
+                                        investment.AssetClass.REAL_ESTATE], name='asset_class')
+        cls._baseline_target = types.SimpleNamespace(
+            dataframe=pd.DataFrame(data=[25.0, 25.0, 50.0], index=cls._baseline_index),
+            num_assets=len(cls._baseline_index))
 
     def setUp(self):
-        fidelity_account = mock.MagicMock(account.Account, autospect=True)
-        fidelity_account.name = 'ACME 401(K) SAVINGS PLAN'
-        fidelity_account.institution = 'Fidelity'
-        fidelity_account.account_file = 'Fidelity_Positions.csv'
-        fidelity_account.is_taxable = True
-        fidelity_account.holdings = [
-            investment.Investment('CRISX', investment.AssetClass.SMALL_CAP, 'Small Cap Value Fund Class Institutional',
-                                  500, share_price=10),
-            investment.Investment('FSKAX', investment.AssetClass.CORE_US, 'Fidelity Total Market Index', 1000,
-                                  share_price=10),
-            investment.Investment('CASH', investment.AssetClass.CASH, 'Money Market', 5000,
-                                  share_price=1)
-        ]
-        fidelity_account.options = [holding.fund for holding in fidelity_account.holdings]
-        vanguard_account = mock.MagicMock(account.Account, autospec=True)
-        vanguard_account.name = 'INDIVIDUAL IRA'
-        vanguard_account.institution = 'Vanguard'
-        vanguard_account.account_file = 'Vanguard_Positions.csv'
-        vanguard_account.is_taxable = False
-        vanguard_account.holdings = [
-            investment.Investment('VNQ', investment.AssetClass.REAL_ESTATE, 'Vanguard Real Estate Index Fund', 2000,
-                                  share_price=10)
-        ]
-        vanguard_account.options = [holding.fund for holding in vanguard_account.holdings]
-        self._portfolio = portfolio.Portfolio([fidelity_account, vanguard_account])
+        # Shared by the tests which only read the portfolio
+        self._portfolio = self._base_portfolio
+
+    def _mutable_portfolio(self) -> portfolio.Portfolio:
+        """Gets a portfolio which a test may modify, over copies of the template accounts."""
+        fidelity_account = copy.copy(self._fidelity_template)
+        fidelity_account.holdings = [copy.copy(holding) for holding in self._FIDELITY_HOLDINGS_TEMPLATE]
+        vanguard_account = copy.copy(self._vanguard_template)
+        vanguard_account.holdings = [copy.copy(holding) for holding in self._VANGUARD_HOLDINGS_TEMPLATE]
+        return portfolio.Portfolio([fidelity_account, vanguard_account])
 
     def test_get_allocation_by_asset_class(self):
-        allocation_index = pd.Index([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP,
-                                     investment.AssetClass.CASH, investment.AssetClass.REAL_ESTATE], name='asset_class')
-        expected_allocation_df = pd.DataFrame(data=[10000.0, 5000.0, 5000.0, 20000.0], index=allocation_index,
-                                              columns=['value'])
-        expected_allocation_df.sort_index(inplace=True)
-        pd.testing.assert_frame_equal(self._portfolio.get_allocation_by_asset_class().sort_index(inplace=False),
-                                      expected_allocation_df)
+        pd.testing.assert_frame_equal(self._portfolio.get_allocation_by_asset_class(),
+                                      _EXPECTED_PCT_BASELINE[['value']], check_exact=True, check_like=True)
 
     def test_get_allocation_by_institution(self):
         allocation_index = pd.Index(['Fidelity', 'Vanguard'], name='institution')
         expected_allocation_df = pd.DataFrame(data=[20000.0, 20000.0], index=allocation_index, columns=['value'])
-        pd.testing.assert_frame_equal(self._portfolio.get_allocation_by_institution().sort_index(inplace=False),
-                                      expected_allocation_df.sort_index(inplace=False))
+        pd.testing.assert_frame_equal(self._portfolio.get_allocation_by_institution(),
+                                      expected_allocation_df, check_exact=True, check_like=True)
 
     def test_get_difference_from_target(self):
-        mock_index = pd.Index([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP,
-                               investment.AssetClass.REAL_ESTATE], name='asset_class')
-        mock_target = mock.MagicMock(allocation.Target, autospec=True)
-        mock_target.dataframe = pd.DataFrame(data=[25.0, 25.0, 50.0], index=mock_index)
-        mock_target.num_assets = len(mock_index)
         expected_index = pd.Index([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP,
                                    investment.AssetClass.REAL_ESTATE, investment.AssetClass.CASH], name='asset_class')
         expected_result = pd.Series(data=[0.000, 12.5, 0.000, -12.5], index=expected_index,
                                     dtype=float)
-        pd.testing.assert_series_equal(self._portfolio.get_difference_from_target(mock_target), expected_result)
+        pd.testing.assert_series_equal(self._portfolio.get_difference_from_target(self._baseline_target),
+                                       expected_result, check_exact=True)
         pass
 
     def test_get_percentage_allocation(self):
-        allocation_index = pd.Index([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP,
-                                     investment.AssetClass.CASH, investment.AssetClass.REAL_ESTATE],
-                                    name='asset_class')
-        expected_allocation_df = pd.DataFrame(data={'value': [10000.0, 5000.0, 5000.0, 20000.0],
-                                                    'fraction': [0.25, 0.125, 0.125, 0.5],
-                                                    'percentage': [25.0, 12.5, 12.5, 50.0]},
-                                              index=allocation_index)
-        pd.testing.assert_frame_equal(self._portfolio.get_percentage_allocation().sort_index(inplace=False),
-                                      expected_allocation_df.sort_index(inplace=False))
+        pd.testing.assert_frame_equal(self._baseline_pct_alloc, _EXPECTED_PCT_BASELINE, check_exact=True,
+                                      check_like=True)
 
     def test_allocate_cash(self):
-        mock_index = pd.Index([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP, \
-                               investment.AssetClass.REAL_ESTATE], name='asset_class')
-        mock_target = mock.MagicMock(allocation.Target, autospec=True)
-        mock_target.dataframe = pd.DataFrame(data=[25.0, 25.0, 50.0], index=mock_index)
-        mock_target.num_assets = len(mock_index)
-        transactions = self._portfolio.allocate_cash(mock_target)
-        expected_transactions = [portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN',
-                                                       'Small Cap Value Fund Class Institutional', 500),
-                                 portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN',
-                                                       'Money Market', -5000)
-                                 ]
-        self.assertCountEqual(transactions, expected_transactions)
+        transactions = self._portfolio.allocate_cash(self._baseline_target)
+        self.assertEqual(set(transactions), self._STANDARD_TXNS)
+
+    def test_allocate_cash_slsqp_fallback(self):
+        with mock.patch('portfolio.optimize.lsq_linear') as mock_lsq_linear:
+            mock_lsq_linear.return_value.status = -1
+            transactions = self._portfolio.allocate_cash(self._baseline_target)
+        self.assertEqual(set(transactions), self._STANDARD_TXNS)
+
+    def test_allocate_cash_fully_invested_account(self):
+        # Without cash, every holding of the brokerage account is bounded to no change
+        brokerage_account = types.SimpleNamespace(
+            name='BROKERAGE', institution='Fidelity', is_taxable=True,
+            holdings=[investment.Investment('VNQ', investment.AssetClass.REAL_ESTATE, _DESC_VNQ, 1000, share_price=10)])
+        test_portfolio = portfolio.Portfolio([self._fidelity_template, self._vanguard_template, brokerage_account])
+        transactions = test_portfolio.allocate_cash(self._baseline_target)
+        self.assertEqual(set(transactions), self._STANDARD_TXNS)
 
     def test_tune_noop(self):
-        mock_index = pd.Index([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP, \
-                               investment.AssetClass.REAL_ESTATE], name='asset_class')
-        mock_target = mock.MagicMock(allocation.Target, autospec=True)
-        mock_target.dataframe = pd.DataFrame(data=[25.0, 25.0, 50.0], index=mock_index)
-        mock_target.num_assets = len(mock_index)
-        transactions = self._portfolio.tune(mock_target)
-        expected_transactions = [portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN',
-                                                       'Small Cap Value Fund Class Institutional', 500),
-                                 portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN',
-                                                       'Money Market', -5000)
-                                 ]
-        self.assertCountEqual(transactions, expected_transactions)
+        transactions = self._portfolio.tune(self._baseline_target)
+        self.assertEqual(set(transactions), self._STANDARD_TXNS)
+
+    def test_equals(self):
+        test_transactions = [portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN', _DESC_CASH, 1e-12)]
+        self.assertEqual(self._portfolio.execute(test_transactions), self._portfolio)
+        test_transactions = [portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN', _DESC_CASH, -1)]
+        self.assertNotEqual(self._portfolio.execute(test_transactions), self._portfolio)
+        self.assertFalse(self._portfolio.execute(test_transactions).equals(self._portfolio, atol=0.5))
+        self.assertTrue(self._portfolio.execute(test_transactions).equals(self._portfolio, atol=1))
+
+    def test_add_holding(self):
+        self._portfolio = self._mutable_portfolio()
+        roth_account = types.SimpleNamespace(name='ROTH IRA', institution='Vanguard', is_taxable=False, holdings=[])
+        self._portfolio.add_holding(roth_account, investment.Investment(
+            'VWO', investment.AssetClass.EMERGING_MARKETS, _DESC_VWO, 1000, share_price=10))
+        allocation_index = pd.CategoricalIndex([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP,
+                                                investment.AssetClass.CASH, investment.AssetClass.REAL_ESTATE,
+                                                investment.AssetClass.EMERGING_MARKETS],
+                                               dtype=_ASSET_CATEGORIES, name='asset_class')
+        expected_allocation_df = pd.DataFrame(data=[10000.0, 5000.0, 5000.0, 20000.0, 10000.0],
+                                              index=allocation_index, columns=['value'])
+        pd.testing.assert_frame_equal(self._portfolio.get_allocation_by_asset_class(),
+                                      expected_allocation_df, check_exact=True, check_like=True)
+        self.assertEqual(len(roth_account.holdings), 1)
+
+    def test_execute_repeated_fund(self):
+        # Both lots of the small cap fund are bought into, as they share a fund name
+        fidelity_account = copy.copy(self._fidelity_template)
+        fidelity_account.holdings = [*self._FIDELITY_HOLDINGS_TEMPLATE, investment.Investment(
+            'CRISX', investment.AssetClass.SMALL_CAP, _DESC_CRISX, 100, share_price=10)]
+        test_portfolio = portfolio.Portfolio([fidelity_account]).execute(self._STANDARD_TXNS)
+        allocation = test_portfolio.get_allocation_by_asset_class()
+        self.assertEqual(allocation.loc[investment.AssetClass.SMALL_CAP, 'value'], (1000 + 600) * 10)
+
+    def test_execute(self):
+        for mode, expected in [('inplace', _EXPECTED_PCT_POSTEXEC), ('not_inplace', _EXPECTED_PCT_POSTEXEC),
+                               ('not_inplace_nochange', _EXPECTED_PCT_BASELINE)]:
+            with self.subTest(mode=mode):
+                if mode == 'inplace':
+                    test_portfolio = self._mutable_portfolio()
+                    # Cached before executing, so executing must invalidate it
+                    test_portfolio.get_percentage_allocation()
+                    test_portfolio.execute(self._STANDARD_TXNS, inplace=True)
+                elif mode == 'not_inplace':
+                    test_portfolio = self._portfolio.execute(self._STANDARD_TXNS, inplace=False)
+                else:
+                    _ = self._portfolio.execute(self._STANDARD_TXNS, inplace=False)
+                    test_portfolio = self._portfolio
+                pd.testing.assert_frame_equal(test_portfolio.get_percentage_allocation(), expected, check_exact=True,
+                                              check_like=True)
+
+
+class PortfolioTuneTest(unittest.TestCase):
+
+    @staticmethod
+    def _rmse_after(test_portfolio, transactions, target) -> float:
+        difference = test_portfolio.execute(transactions).get_difference_from_target(target).to_numpy()
+        return np.sqrt(np.mean(difference ** 2))
+
+    def test_tune_multiple_accounts(self):
+        taxable_account = types.SimpleNamespace(
+            name='BROKERAGE', institution='Fidelity', is_taxable=True,
+            holdings=[
+                investment.Investment('TIPS', investment.AssetClass.INFLATION_PROTECTED_BONDS, 'TIPS Fund', 3392,
+                                      share_price=274.21),
+                investment.Investment('ISCV', investment.AssetClass.INTERNATIONAL_SMALL_CAP_VALUE,
+                                      'International Small Cap Value Fund', 0, share_price=33.75),
+                investment.Investment('BND', investment.AssetClass.INVESTMENT_GRADE_BONDS, 'Bond Fund', 3867,
+                                      share_price=69.24),
+                investment.Investment('CASH', investment.AssetClass.CASH, _DESC_CASH, 62096, share_price=1)
+            ])
+        ira_account = types.SimpleNamespace(
+            name='INDIVIDUAL IRA', institution='Vanguard', is_taxable=False,
+            holdings=[
+                investment.Investment('FSKAX', investment.AssetClass.CORE_US, _DESC_FSKAX, 1599, share_price=225.04),
+                investment.Investment('CRISX', investment.AssetClass.SMALL_CAP, _DESC_CRISX, 0, share_price=481.78),
+                investment.Investment('CASH', investment.AssetClass.CASH, _DESC_CASH, 11866, share_price=1)
+            ])
+        test_portfolio = portfolio.Portfolio([taxable_account, ira_account])
+        target_index = pd.Index([investment.AssetClass.SMALL_CAP, investment.AssetClass.CASH])
+        target = types.SimpleNamespace(dataframe=pd.DataFrame(data=[24.84, 75.16], index=target_index),
+                                       num_assets=len(target_index))
+        tune_rmse = self._rmse_after(test_portfolio, test_portfolio.tune(target), target)
+        with mock.patch('portfolio.optimize.lsq_linear') as mock_lsq_linear:
+            mock_lsq_linear.return_value.status = -1
+            slsqp_rmse = self._rmse_after(test_portfolio, test_portfolio.tune(target), target)
+        allocate_cash_rmse = self._rmse_after(test_portfolio, test_portfolio.allocate_cash(target), target)
+        # Allowing for the rounding of transactions to hundredths of a share
+        self.assertLessEqual(tune_rmse, slsqp_rmse + 1e-3)
+        # Tuning may also rebalance the IRA, so it does at least as well as only allocating cash
+        self.assertLessEqual(tune_rmse, allocate_cash_rmse + 1e-3)
+        self.assertAlmostEqual(tune_rmse, 33.8965, places=3)
 
     def test_tune(self):
-        vanguard_account = mock.MagicMock(account.Account, autospec=True)
-        vanguard_account.name = 'INDIVIDUAL IRA'
-        vanguard_account.institution = 'Vanguard'
-        vanguard_account.account_file = 'Vanguard_Positions.csv'
-        vanguard_account.is_taxable = False
-        vanguard_account.holdings = [
-            investment.Investment('CRISX', investment.AssetClass.SMALL_CAP, 'Small Cap Value Fund Class Institutional',
-                                  3000, share_price=10),
-            investment.Investment('FSKAX', investment.AssetClass.CORE_US, 'Fidelity Total Market Index', 2000,
-                                  share_price=10),
-            investment.Investment('VNQ', investment.AssetClass.REAL_ESTATE, 'Vanguard Real Estate Index Fund', 3000,
-                                  share_price=10)
-        ]
+        vanguard_account = types.SimpleNamespace(
+            name='INDIVIDUAL IRA', institution='Vanguard', account_file='Vanguard_Positions.csv', is_taxable=False,
+            holdings=[
+                investment.Investment('CRISX', investment.AssetClass.SMALL_CAP, _DESC_CRISX, 3000, share_price=10),
+                investment.Investment('FSKAX', investment.AssetClass.CORE_US, _DESC_FSKAX, 2000, share_price=10),
+                investment.Investment('VNQ', investment.AssetClass.REAL_ESTATE, _DESC_VNQ, 3000, share_price=10)
+            ])
         vanguard_account.options = [holding.fund for holding in vanguard_account.holdings]
-        self._portfolio = portfolio.Portfolio([vanguard_account])
+        test_portfolio = portfolio.Portfolio([vanguard_account])
         mock_index = pd.Index([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP,
                                investment.AssetClass.REAL_ESTATE], name='asset_class')
-        mock_target = mock.MagicMock(allocation.Target, autospec=True)
-        mock_target.dataframe = pd.DataFrame(data=[25.0, 25.0, 50.0], index=mock_index)
-        mock_target.num_assets = len(mock_index)
-        transactions = self._portfolio.tune(mock_target)
-        expected_transactions = [portfolio.Transaction('Vanguard', 'INDIVIDUAL IRA',
-                                                       'Small Cap Value Fund Class Institutional', -1000),
-                                 portfolio.Transaction('Vanguard', 'INDIVIDUAL IRA',
-                                                       'Vanguard Real Estate Index Fund', 1000)
-                                 ]
-        self.assertCountEqual(transactions, expected_transactions)
-
-    def test_execute_inplace(self):
-        test_transactions = [portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN',
-                                                   'Small Cap Value Fund Class Institutional', 500),
-                             portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN',
-                                                   'Money Market', -5000)
-                             ]
-        self._portfolio.execute(test_transactions, inplace=True)
-        allocation_index = pd.Index([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP,
-                                     investment.AssetClass.CASH, investment.AssetClass.REAL_ESTATE],
-                                    name='asset_class')
-        expected_allocation_df = pd.DataFrame(data={'value': [10000.0, 10000.0, 0.0, 20000.0],
-                                                    'fraction': [0.25, 0.25, 0.0, 0.5],
-                                                    'percentage': [25.0, 25.0, 0.0, 50.0]},
-                                              index=allocation_index)
-        pd.testing.assert_frame_equal(self._portfolio.get_percentage_allocation().sort_index(inplace=False),
-                                      expected_allocation_df.sort_index(inplace=False))
-
-    def test_execute_not_inplace(self):
-        test_transactions = [portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN',
-                                                   'Small Cap Value Fund Class Institutional', 500),
-                             portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN',
-                                                   'Money Market', -5000)
-                             ]
-        test_portolio = self._portfolio.execute(test_transactions, inplace=False)
-        allocation_index = pd.Index([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP,
-                                     investment.AssetClass.CASH, investment.AssetClass.REAL_ESTATE],
-                                    name='asset_class')
-        expected_allocation_df = pd.DataFrame(data={'value': [10000.0, 10000.0, 0.0, 20000.0],
-                                                    'fraction': [0.25, 0.25, 0.0, 0.5],
-                                                    'percentage': [25.0, 25.0, 0.0, 50.0]},
-                                              index=allocation_index)
-        pd.testing.assert_frame_equal(test_portolio.get_percentage_allocation().sort_index(inplace=False),
-                                      expected_allocation_df.sort_index(inplace=False))
-
-    def test_execute_not_inplace_nochange(self):
-        test_transactions = [portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN',
-                                                   'Small Cap Value Fund Class Institutional', 500),
-                             portfolio.Transaction('Fidelity', 'ACME 401(K) SAVINGS PLAN',
-                                                   'Money Market', -5000)
-                             ]
-        _ = self._portfolio.execute(test_transactions, inplace=False)
-        allocation_index = pd.Index([investment.AssetClass.CORE_US, investment.AssetClass.SMALL_CAP,
-                                     investment.AssetClass.CASH, investment.AssetClass.REAL_ESTATE],
-                                    name='asset_class')
-        expected_allocation_df = pd.DataFrame(data={'value': [10000.0, 5000.0, 5000.0, 20000.0],
-                                                    'fraction': [0.25, 0.125, 0.125, 0.5],
-                                                    'percentage': [25.0, 12.5, 12.5, 50.0]},
-                                              index=allocation_index)
-        pd.testing.assert_frame_equal(self._portfolio.get_percentage_allocation().sort_index(inplace=False),
-                                      expected_allocation_df.sort_index(inplace=False))
-
+        mock_target = types.SimpleNamespace(dataframe=pd.DataFrame(data=[25.0, 25.0, 50.0], index=mock_index),
+                                            num_assets=len(mock_index))
+        transactions = test_portfolio.tune(mock_target)
+        self.assertEqual(set(transactions), {portfolio.Transaction('Vanguard', 'INDIVIDUAL IRA', _DESC_CRISX, -1000),
+                                             portfolio.Transaction('Vanguard', 'INDIVIDUAL IRA', _DESC_VNQ, 1000)})
 
 
 if __name__ == '__main__':